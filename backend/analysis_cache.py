@@ -0,0 +1,84 @@
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+from cachetools import TTLCache
+import redis
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    def __init__(self, redis_url: Optional[str] = None, ttl: int = 3600, maxsize: int = 1024):
+        self.ttl = ttl
+        self.key_prefix = 'analysis:'
+        self.local_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.local_lock = threading.Lock()
+        self.redis_client = None
+        self.setup_redis(redis_url)
+
+    def setup_redis(self, redis_url: Optional[str]):
+        """Connect to Redis, falling back to the in-process cache if unavailable"""
+        if not redis_url:
+            logger.info("REDIS_URL not set. Using in-process analysis cache.")
+            return
+
+        try:
+            client = redis.Redis.from_url(redis_url)
+            client.ping()
+            self.redis_client = client
+            logger.info("Redis analysis cache initialized successfully")
+        except Exception as e:
+            logger.warning(f"Failed to connect to Redis, using in-process analysis cache: {str(e)}")
+            self.redis_client = None
+
+    def make_key(self, kind: str, *parts) -> str:
+        """Build a cache key from a SHA-256 digest of the given parts"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, (bytes, bytearray, memoryview)):
+                part = str(part).encode('utf-8')
+            digest.update(part)
+            digest.update(b'\0')
+        return f"{self.key_prefix}{kind}:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss"""
+        if self.redis_client:
+            try:
+                value = self.redis_client.get(key)
+                return json.loads(value) if value is not None else None
+            except Exception as e:
+                logger.warning(f"Redis get failed, using in-process cache: {str(e)}")
+
+        with self.local_lock:
+            value = self.local_cache.get(key)
+        return dict(value) if value is not None else None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a result under key for the configured TTL"""
+        if self.redis_client:
+            try:
+                self.redis_client.setex(key, self.ttl, json.dumps(value))
+                return
+            except Exception as e:
+                logger.warning(f"Redis set failed, using in-process cache: {str(e)}")
+
+        with self.local_lock:
+            self.local_cache[key] = dict(value)
+
+    def clear(self) -> int:
+        """Remove every cached analysis result and return how many were removed"""
+        with self.local_lock:
+            removed = len(self.local_cache)
+            self.local_cache.clear()
+
+        if self.redis_client:
+            try:
+                keys = list(self.redis_client.scan_iter(match=f"{self.key_prefix}*", count=500))
+                for i in range(0, len(keys), 500):
+                    removed += self.redis_client.delete(*keys[i:i + 500])
+            except Exception as e:
+                logger.warning(f"Failed to clear Redis analysis cache: {str(e)}")
+
+        return removed
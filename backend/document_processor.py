@@ -1,29 +1,151 @@
 import os
 import re
+import shutil
+import subprocess
 import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse, parse_qs
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
-from PyPDF2 import PdfReader
-from docx import Document
+import threading
+import zipfile
+import fitz
+from cachetools import TTLCache
+from lxml import etree
 from bs4 import BeautifulSoup
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+import google_auth_httplib2
 import pickle
 import base64
 import io
 
 logger = logging.getLogger(__name__)
 
+# Poppler's pdftotext is much faster than in-process parsing on large,
+# figure-heavy PDFs; probe for it once at import time
+PDFTOTEXT_PATH = shutil.which('pdftotext')
+PDFTOTEXT_MIN_BYTES = 256 * 1024
+PDFTOTEXT_TIMEOUT = 60
+# pdftotext can't stop at a character count, so a character budget becomes a
+# page limit assuming pages average at least this many characters
+PDFTOTEXT_MIN_PAGE_CHARS = 500
+
+# Google Drive file ID in a drive.google.com link:
+#   https://drive.google.com/file/d/{file_id}/view
+#   https://drive.google.com/open?id={file_id}
+DRIVE_ID_RE = re.compile(r'(?:/file/d/|/document/d/|/spreadsheets/d/|[?&]id=)([a-zA-Z0-9_-]+)')
+
+# Docs and Sheets links carry the file type in their path, which saves a
+# metadata request before exporting them:
+#   https://docs.google.com/document/d/{file_id}/edit
+#   https://docs.google.com/spreadsheets/d/{file_id}/edit
+#   https://docs.google.com/a/{domain}/document/d/{file_id}/edit
+# Published copies (/document/d/e/{publish_id}/pub) aren't Drive file IDs and
+# are left to be fetched as ordinary web pages.
+DRIVE_TYPED_PATH_RE = re.compile(r'^(?:/a/[^/]+)?/(document|spreadsheets)/d/(?!e/)([a-zA-Z0-9_-]+)')
+GOOGLE_DRIVE_HOSTS = ('drive.google.com', 'docs.google.com')
+DRIVE_PATH_MIME_TYPES = {
+    'document': 'application/vnd.google-apps.document',
+    'spreadsheets': 'application/vnd.google-apps.spreadsheet',
+}
+
+# WordprocessingML elements needed to pull paragraph text out of a DOCX
+WORD_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_BODY = f'{{{WORD_NS}}}body'
+W_P = f'{{{WORD_NS}}}p'
+W_T = f'{{{WORD_NS}}}t'
+W_BR = f'{{{WORD_NS}}}br'
+W_TYPE = f'{{{WORD_NS}}}type'
+# Text equivalents of the other run content elements, as in python-docx
+DOCX_RUN_TEXT = {
+    f'{{{WORD_NS}}}tab': '\t',
+    f'{{{WORD_NS}}}ptab': '\t',
+    f'{{{WORD_NS}}}cr': '\n',
+    f'{{{WORD_NS}}}noBreakHyphen': '-',
+}
+DOCX_RUN_CONTENT = etree.XPath('./w:r/* | ./w:hyperlink/w:r/*', namespaces={'w': WORD_NS})
+
+# Drive exports (CSV in particular) use CRLF line endings
+STRIP_CR = str.maketrans('', '', '\r')
+
+# Recently fetched Google Drive files are served from memory for a few minutes
+DRIVE_CACHE_SIZE = 512
+DRIVE_CACHE_TTL = 300
+
+# Maximum number of calls the Drive API accepts in one batch request
+DRIVE_BATCH_SIZE = 100
+
+# Documents are truncated to this many characters before analysis (Gemini has
+# limits); extractors stop reading a little past it since the rest is discarded
+MAX_CONTENT_CHARS = 30000
+EXTRACTION_MARGIN_CHARS = 1024
+
+# Only text-like responses are worth parsing, and at most this much of them is
+# downloaded (the extracted text is truncated to MAX_CONTENT_CHARS anyway)
+URL_TEXT_CONTENT_TYPES = ('text/', 'application/xhtml+xml', 'application/xml', 'application/json')
+MAX_URL_FETCH_BYTES = 10 * 1024 * 1024
+
+# Marks a Google Drive service that hasn't been set up yet (None means unavailable)
+DRIVE_SERVICE_UNSET = object()
+
+URL_FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
 class DocumentProcessor:
     def __init__(self):
-        self.google_drive_service = None
-        self.setup_google_drive()
+        self.drive_service = DRIVE_SERVICE_UNSET
+        self.drive_service_lock = threading.Lock()
+        self.drive_credentials = None
+        self.drive_http_local = threading.local()
+        self.drive_cache = TTLCache(maxsize=DRIVE_CACHE_SIZE, ttl=DRIVE_CACHE_TTL)
+        self.drive_mime_cache = TTLCache(maxsize=DRIVE_CACHE_SIZE, ttl=DRIVE_CACHE_TTL)
+        self.drive_cache_lock = threading.Lock()
+        self.http_session = self.create_http_session()
+    
+    @property
+    def google_drive_service(self):
+        """Google Drive API service, set up on first use (None if unavailable)"""
+        if self.drive_service is DRIVE_SERVICE_UNSET:
+            with self.drive_service_lock:
+                if self.drive_service is DRIVE_SERVICE_UNSET:
+                    self.drive_service = self.setup_google_drive()
+        return self.drive_service
+    
+    def drive_http(self):
+        """Authorized HTTP client for Drive calls made on the current thread"""
+        # The service's own httplib2.Http isn't thread-safe, and batch items fetch
+        # Drive files concurrently, so each thread executes requests on its own
+        http = getattr(self.drive_http_local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.drive_credentials, http=build_http())
+            self.drive_http_local.http = http
+        return http
+    
+    def create_http_session(self) -> requests.Session:
+        """Create a pooled HTTP session so repeat fetches reuse TCP/TLS connections"""
+        session = requests.Session()
+        session.headers.update(URL_FETCH_HEADERS)
+        # The session is shared by every user's fetches, so don't let one site's
+        # cookies be stored and replayed on someone else's request
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
     
     def setup_google_drive(self):
-        """Setup Google Drive API service"""
+        """Setup Google Drive API service, returning None if it isn't available"""
         try:
             # Google Drive API scopes
             SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
@@ -41,153 +163,296 @@ class DocumentProcessor:
                 else:
                     # For now, we'll skip Google Drive setup if credentials aren't available
                     logger.warning("Google Drive credentials not available. Google Drive links will not work.")
-                    return
+                    return None
                 
                 # Save the credentials for the next run
                 with open('token.pickle', 'wb') as token:
                     pickle.dump(creds, token)
             
-            self.google_drive_service = build('drive', 'v3', credentials=creds)
+            # Use the discovery document bundled with googleapiclient instead of fetching it
+            self.drive_credentials = creds
+            service = build('drive', 'v3', credentials=creds, cache_discovery=False, static_discovery=True)
             logger.info("Google Drive API service initialized successfully")
+            return service
             
         except Exception as e:
             logger.warning(f"Failed to setup Google Drive API: {str(e)}")
-            self.google_drive_service = None
+            return None
     
     def extract_google_drive_id(self, url: str) -> Optional[str]:
         """Extract Google Drive file ID from various Google Drive URL formats"""
         try:
+            parsed = self.parse_google_url(url)
+            host = (parsed.hostname or '').lower()
+            
             # Handle different Google Drive URL formats
-            if 'drive.google.com' in url:
-                # Format: https://drive.google.com/file/d/{file_id}/view
-                match = re.search(r'/file/d/([a-zA-Z0-9_-]+)', url)
-                if match:
-                    return match.group(1)
-                
-                # Format: https://drive.google.com/open?id={file_id}
-                match = re.search(r'[?&]id=([a-zA-Z0-9_-]+)', url)
+            if host == 'drive.google.com':
+                match = DRIVE_ID_RE.search(url)
                 if match:
                     return match.group(1)
-                
-                # Format: https://docs.google.com/document/d/{file_id}/edit
-                match = re.search(r'/document/d/([a-zA-Z0-9_-]+)', url)
-                if match:
-                    return match.group(1)
-                
-                # Format: https://docs.google.com/spreadsheets/d/{file_id}/edit
-                match = re.search(r'/spreadsheets/d/([a-zA-Z0-9_-]+)', url)
+            elif host == 'docs.google.com':
+                match = DRIVE_TYPED_PATH_RE.match(parsed.path)
                 if match:
-                    return match.group(1)
+                    return match.group(2)
             
             return None
         except Exception as e:
             logger.error(f"Error extracting Google Drive ID: {str(e)}")
             return None
     
-    def get_google_drive_content(self, file_id: str) -> Optional[str]:
-        """Get content from Google Drive file"""
+    def parse_google_url(self, url: str):
+        """Parse a URL, accepting Google links pasted without a scheme"""
+        return urlparse(url if '//' in url else '//' + url)
+    
+    def guess_google_drive_mime_type(self, url: str) -> Optional[str]:
+        """Infer the Google Drive file's MIME type from its URL path, if possible"""
+        parsed = self.parse_google_url(url)
+        if (parsed.hostname or '').lower() not in GOOGLE_DRIVE_HOSTS:
+            return None
+        match = DRIVE_TYPED_PATH_RE.match(parsed.path)
+        return DRIVE_PATH_MIME_TYPES[match.group(1)] if match else None
+    
+    def get_google_drive_content(self, file_id: str, mime_type: Optional[str] = None) -> Optional[str]:
+        """Get content from Google Drive file, reusing recently fetched content"""
+        with self.drive_cache_lock:
+            content = self.drive_cache.get(file_id)
+            if not mime_type:
+                mime_type = self.drive_mime_cache.get(file_id)
+        if content is not None:
+            return content
+        
+        content = self.fetch_google_drive_content(file_id, mime_type)
+        if content:
+            # Docs/Sheets exports arrive whole; only keep what the caller can use,
+            # with the same margin the extractors use so truncation still shows
+            content = content[:MAX_CONTENT_CHARS + EXTRACTION_MARGIN_CHARS]
+            with self.drive_cache_lock:
+                self.drive_cache[file_id] = content
+        return content
+    
+    def prefetch_google_drive_metadata(self, urls: List[str]) -> Dict[str, str]:
+        """Look up the MIME types of several Google Drive files in batched API requests"""
+        mime_types = {}
+        
+        # Only files whose type isn't already known from the URL or a cache need a lookup
+        file_ids = []
+        for url in urls:
+            file_id = self.extract_google_drive_id(url)
+            if file_id and not self.guess_google_drive_mime_type(url):
+                file_ids.append(file_id)
+        with self.drive_cache_lock:
+            file_ids = [file_id for file_id in dict.fromkeys(file_ids)
+                        if file_id not in self.drive_cache and file_id not in self.drive_mime_cache]
+        
+        # Check the service last so batches without Drive links never set it up
+        if not file_ids or not self.google_drive_service:
+            return mime_types
+        
+        def store_mime_type(request_id, response, exception):
+            # Failed lookups are left for the per-file request to retry and report
+            if exception is None:
+                mime_types[request_id] = response.get('mimeType', '')
+        
+        try:
+            for start in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+                batch = self.google_drive_service.new_batch_http_request(callback=store_mime_type)
+                for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+                    batch.add(
+                        self.google_drive_service.files().get(
+                            fileId=file_id,
+                            fields='mimeType',
+                            supportsAllDrives=True
+                        ),
+                        request_id=file_id
+                    )
+                batch.execute(http=self.drive_http())
+        except Exception as e:
+            logger.warning(f"Batched Google Drive metadata lookup failed: {str(e)}")
+        
+        with self.drive_cache_lock:
+            self.drive_mime_cache.update(mime_types)
+        return mime_types
+    
+    def fetch_google_drive_content(self, file_id: str, mime_type: Optional[str] = None) -> Optional[str]:
+        """Download and extract content from Google Drive file"""
         try:
             if not self.google_drive_service:
                 return None
             
-            # Get file metadata
-            file_metadata = self.google_drive_service.files().get(
-                fileId=file_id, 
-                fields='name,mimeType'
-            ).execute()
-            
-            mime_type = file_metadata.get('mimeType', '')
-            
-            # Handle different file types
-            if 'google-apps.document' in mime_type:
-                # Google Docs
-                content = self.google_drive_service.files().export(
-                    fileId=file_id, 
-                    mimeType='text/plain'
-                ).execute()
-                return content.decode('utf-8')
-            
-            elif 'google-apps.spreadsheet' in mime_type:
-                # Google Sheets
-                content = self.google_drive_service.files().export(
+            # Get file metadata, unless the caller already knows the type
+            if not mime_type:
+                file_metadata = self.google_drive_service.files().get(
                     fileId=file_id, 
-                    mimeType='text/csv'
-                ).execute()
-                return content.decode('utf-8')
+                    fields='mimeType',
+                    supportsAllDrives=True
+                ).execute(http=self.drive_http())
+                mime_type = file_metadata.get('mimeType', '')
             
-            elif 'application/pdf' in mime_type:
-                # PDF files
-                response = self.google_drive_service.files().get_media(fileId=file_id).execute()
-                return self.extract_pdf_text(io.BytesIO(response))
+            # Anything without a dedicated handler is tried as a plain text export
+            handler = self.DRIVE_CONTENT_HANDLERS.get(mime_type, DocumentProcessor.get_drive_plain_text)
+            return handler(self, file_id)
             
-            elif 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in mime_type:
-                # DOCX files
-                response = self.google_drive_service.files().get_media(fileId=file_id).execute()
-                return self.extract_docx_text(io.BytesIO(response))
-            
-            else:
-                # Try to get as plain text
-                try:
-                    content = self.google_drive_service.files().export(
-                        fileId=file_id, 
-                        mimeType='text/plain'
-                    ).execute()
-                    return content.decode('utf-8')
-                except:
-                    return None
-                    
         except Exception as e:
             logger.error(f"Error getting Google Drive content: {str(e)}")
             return None
     
-    def extract_pdf_text(self, file_stream) -> str:
-        """Extract text from PDF file"""
+    def export_drive_text(self, file_id: str, export_mime_type: str) -> str:
+        """Export a Google Workspace file from Google Drive as text"""
+        content = self.google_drive_service.files().export(
+            fileId=file_id, 
+            mimeType=export_mime_type
+        ).execute(http=self.drive_http())
+        return content.decode('utf-8', 'replace').translate(STRIP_CR)
+    
+    def download_drive_file(self, file_id: str) -> io.BytesIO:
+        """Download a Google Drive file's contents"""
+        response = self.google_drive_service.files().get_media(
+            fileId=file_id,
+            supportsAllDrives=True
+        ).execute(http=self.drive_http())
+        return io.BytesIO(response)
+    
+    def get_google_doc_text(self, file_id: str) -> str:
+        """Get the text of a Google Docs file"""
+        return self.export_drive_text(file_id, 'text/plain')
+    
+    def get_google_sheet_text(self, file_id: str) -> str:
+        """Get a Google Sheets file as CSV"""
+        return self.export_drive_text(file_id, 'text/csv')
+    
+    def get_drive_pdf_text(self, file_id: str) -> str:
+        """Get the text of a PDF stored in Google Drive"""
+        return self.extract_pdf_text(self.download_drive_file(file_id), MAX_CONTENT_CHARS)
+    
+    def get_drive_docx_text(self, file_id: str) -> str:
+        """Get the text of a DOCX stored in Google Drive"""
+        return self.extract_docx_text(self.download_drive_file(file_id), MAX_CONTENT_CHARS)
+    
+    def get_drive_plain_text(self, file_id: str) -> Optional[str]:
+        """Try to export any other Google Drive file as plain text"""
+        try:
+            return self.export_drive_text(file_id, 'text/plain')
+        except Exception:
+            return None
+    
+    # Google Drive MIME type -> handler returning the file's text content
+    DRIVE_CONTENT_HANDLERS = {
+        'application/vnd.google-apps.document': get_google_doc_text,
+        'application/vnd.google-apps.spreadsheet': get_google_sheet_text,
+        'application/pdf': get_drive_pdf_text,
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': get_drive_docx_text,
+    }
+    
+    def extract_pdf_text(self, file_stream, max_chars: Optional[int] = None) -> str:
+        """Extract text from PDF file, stopping early once max_chars is exceeded"""
         try:
-            pdf_reader = PdfReader(file_stream)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            # BytesIO.getvalue() shares the existing buffer instead of copying it
+            data = file_stream.getvalue() if isinstance(file_stream, io.BytesIO) else file_stream.read()
+            if PDFTOTEXT_PATH and len(data) > PDFTOTEXT_MIN_BYTES:
+                text = self.run_pdftotext(data, max_chars)
+                if text:
+                    return text
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                pages = []
+                total_chars = 0
+                for page in doc:
+                    text = page.get_text("text")
+                    pages.append(text)
+                    total_chars += len(text) + 1
+                    if max_chars and total_chars > max_chars + EXTRACTION_MARGIN_CHARS:
+                        break
+                return "\n".join(pages).strip()
         except Exception as e:
             logger.error(f"Error extracting PDF text: {str(e)}")
             return ""
     
-    def extract_docx_text(self, file_stream) -> str:
-        """Extract text from DOCX file"""
+    def run_pdftotext(self, data: bytes, max_chars: Optional[int] = None) -> str:
+        """Extract text with the pdftotext binary, returning an empty string on failure"""
+        # The default mode keeps reading order; -layout would interleave columns
+        # and pad lines with spaces that count against the character budget
+        command = [PDFTOTEXT_PATH, '-q']
+        if max_chars:
+            last_page = (max_chars + EXTRACTION_MARGIN_CHARS) // PDFTOTEXT_MIN_PAGE_CHARS + 1
+            command += ['-l', str(last_page)]
+        command += ['-', '-']
+        
+        try:
+            result = subprocess.run(
+                command,
+                input=data,
+                capture_output=True,
+                timeout=PDFTOTEXT_TIMEOUT
+            )
+            if result.returncode != 0:
+                logger.warning(f"pdftotext exited with status {result.returncode}, falling back to PyMuPDF")
+                return ""
+            # Pages are separated by form feeds; use newlines as the PyMuPDF path does
+            return result.stdout.decode('utf-8', 'replace').replace('\f', '\n').strip()
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"pdftotext failed, falling back to PyMuPDF: {str(e)}")
+            return ""
+    
+    def extract_docx_text(self, file_stream, max_chars: Optional[int] = None) -> str:
+        """Extract text from DOCX file, stopping early once max_chars is exceeded"""
         try:
-            doc = Document(file_stream)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            paragraphs = []
+            total_chars = 0
+            # Stream word/document.xml rather than loading the whole document
+            # model; only top-level body paragraphs are read, as before
+            with zipfile.ZipFile(file_stream) as docx, docx.open('word/document.xml') as xml:
+                for _, paragraph in etree.iterparse(xml, events=('end',), tag=W_P, resolve_entities=False):
+                    if paragraph.getparent().tag != W_BODY:
+                        continue
+                    
+                    text = self.docx_paragraph_text(paragraph)
+                    paragraphs.append(text)
+                    total_chars += len(text) + 1
+                    if max_chars and total_chars > max_chars + EXTRACTION_MARGIN_CHARS:
+                        break
+                    
+                    # Free paragraphs and tables that have already been read
+                    paragraph.clear()
+                    while paragraph.getprevious() is not None:
+                        del paragraph.getparent()[0]
+            return "\n".join(paragraphs).strip()
         except Exception as e:
             logger.error(f"Error extracting DOCX text: {str(e)}")
             return ""
     
+    def docx_paragraph_text(self, paragraph) -> str:
+        """Get the text of a DOCX paragraph element, including hyperlinks, tabs and breaks"""
+        parts = []
+        for element in DOCX_RUN_CONTENT(paragraph):
+            if element.tag == W_T:
+                parts.append(element.text or '')
+            elif element.tag == W_BR:
+                # Only line breaks become newlines; page and column breaks are dropped
+                if element.get(W_TYPE, 'textWrapping') == 'textWrapping':
+                    parts.append('\n')
+            else:
+                parts.append(DOCX_RUN_TEXT.get(element.tag, ''))
+        return ''.join(parts)
+    
     def extract_url_content(self, url: str) -> str:
         """Extract content from URL"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html5lib')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text content
-            text = soup.get_text()
+            with self.http_session.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                
+                # Skip binary responses without downloading them
+                content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                if content_type and not content_type.startswith(URL_TEXT_CONTENT_TYPES):
+                    logger.warning(f"Skipping URL with unsupported content type: {content_type}")
+                    return ""
+                
+                body = response.raw.read(MAX_URL_FETCH_BYTES, decode_content=True)
             
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            soup = BeautifulSoup(body, 'lxml')
             
-            return text
+            # Get text content with whitespace runs collapsed to single spaces;
+            # get_text() already skips <script>/<style> contents, so they don't
+            # need to be removed from the tree first
+            return ' '.join(soup.get_text(' ').split())
         except Exception as e:
             logger.error(f"Error extracting URL content: {str(e)}")
             return ""
@@ -201,14 +466,18 @@ class DocumentProcessor:
             if 'file' in document_data:
                 # Handle uploaded file
                 file = document_data['file']
-                file_content = file.read()
                 file_extension = os.path.splitext(file.filename)[1].lower()
                 
+                # Werkzeug already spools uploads to a seekable stream, so hand
+                # it to the extractors directly rather than copying it
+                file_stream = file.stream
+                file_stream.seek(0)
+                
                 if file_extension == '.pdf':
-                    content = self.extract_pdf_text(io.BytesIO(file_content))
+                    content = self.extract_pdf_text(file_stream, MAX_CONTENT_CHARS)
                     source_type = "PDF"
                 elif file_extension in ['.docx', '.doc']:
-                    content = self.extract_docx_text(io.BytesIO(file_content))
+                    content = self.extract_docx_text(file_stream, MAX_CONTENT_CHARS)
                     source_type = "DOCX"
                 else:
                     return {
@@ -223,8 +492,14 @@ class DocumentProcessor:
                 # Check if it's a Google Drive URL
                 drive_id = self.extract_google_drive_id(url)
                 if drive_id:
-                    content = self.get_google_drive_content(drive_id)
+                    mime_type = self.guess_google_drive_mime_type(url)
+                    content = self.get_google_drive_content(drive_id, mime_type)
                     source_type = "Google Drive"
+                    if not content and mime_type:
+                        # Docs/Sheets links are also readable as web pages, so fall
+                        # back to that when Drive isn't set up or can't export them
+                        content = self.extract_url_content(url)
+                        source_type = "URL"
                     if not content:
                         return {
                             'success': False,
@@ -258,8 +533,8 @@ class DocumentProcessor:
                 }
             
             # Truncate content if too long (Gemini has limits)
-            if len(content) > 30000:
-                content = content[:30000] + "\n\n[Content truncated due to length...]"
+            if len(content) > MAX_CONTENT_CHARS:
+                content = content[:MAX_CONTENT_CHARS] + "\n\n[Content truncated due to length...]"
             
             return {
                 'success': True,
@@ -0,0 +1,27 @@
+import os
+import multiprocessing
+
+# Gunicorn configuration for production deployments
+# Usage: gunicorn -c gunicorn_conf.py app:app
+
+# Bind to the same host and port as the development server
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '3000')}"
+
+# Requests spend most of their time waiting on Gemini, so use threaded workers
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2))
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+
+# Large images and documents can take a while to analyze
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app once in the master so configuration, the model and the
+# document processor are set up before forking and shared by all workers
+preload_app = True
+
+# Log to stdout/stderr
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info')
@@ -0,0 +1,17 @@
+import io
+from PIL import Image
+
+# Kept separate from app.py so the image pool's spawned workers can unpickle
+# normalize_image by importing just this module and PIL. Spawned children also
+# re-import the parent's main script: under gunicorn that is gunicorn's own
+# guarded entry point, and app.py's dev entry point hides itself from them
+
+def normalize_image(image_bytes: bytes) -> bytes:
+    """Convert an image Gemini can't read inline to RGB JPEG bytes"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    output = io.BytesIO()
+    image.save(output, format='JPEG')
+    return output.getvalue()